@@ -22,3 +22,4 @@
 from .version import *  # Generated by sconsUtils
 from ._instrument import *
 from .spectrum import *
+from .sharedSpectrum import *
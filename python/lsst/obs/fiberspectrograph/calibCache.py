@@ -0,0 +1,130 @@
+# This file is part of obs_fiberspectrograph
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["CalibrationCache"]
+
+import collections
+import threading
+
+
+class CalibrationCache:
+    """A bounded least-recently-used cache of calibration products.
+
+    A single instance is meant to be shared by all the tasks run in one
+    process, so access is serialised with a lock.  Cached values are shared
+    between callers and must be treated as read-only.
+
+    Parameters
+    ----------
+    maxSize : `int`
+        Maximum number of entries to keep.
+    """
+
+    def __init__(self, maxSize):
+        if maxSize < 1:
+            raise ValueError(f"maxSize must be positive, not {maxSize}")
+        self._maxSize = maxSize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def maxSize(self):
+        """Maximum number of entries kept (`int`)."""
+        return self._maxSize
+
+    def resize(self, maxSize):
+        """Change the maximum size, evicting the oldest entries if needed.
+
+        Parameters
+        ----------
+        maxSize : `int`
+            New maximum number of entries.
+        """
+        if maxSize < 1:
+            raise ValueError(f"maxSize must be positive, not {maxSize}")
+        with self._lock:
+            self._maxSize = maxSize
+            self._evict()
+
+    def reserve(self, maxSize):
+        """Grow the cache to hold at least ``maxSize`` entries.
+
+        Unlike `resize` this never shrinks the cache, so callers sharing it
+        cannot evict each other's entries by asking for different sizes.
+
+        Parameters
+        ----------
+        maxSize : `int`
+            Minimum number of entries to keep.
+        """
+        with self._lock:
+            if maxSize > self._maxSize:
+                self.resize(maxSize)
+
+    def get(self, key, factory):
+        """Return the cached value for ``key``, creating it if necessary.
+
+        Parameters
+        ----------
+        key : hashable
+            Cache key, e.g. a dataset ID together with the kind of product.
+        factory : callable
+            Called with no arguments to create the value on a cache miss.
+
+        Returns
+        -------
+        value : `object`
+            The cached or newly created value.
+        hit : `bool`
+            Whether ``value`` was already in the cache.  Unlike the `hits`
+            and `misses` totals, this is unaffected by other threads using
+            the cache.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], True
+
+            self.misses += 1
+            value = factory()
+            self._entries[key] = value
+            self._evict()
+            return value, False
+
+    def clear(self):
+        """Remove all entries and reset the hit and miss counts."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(self):
+        while len(self._entries) > self._maxSize:
+            self._entries.popitem(last=False)
@@ -20,6 +20,8 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import astropy.io.fits
+import astropy.table
+import numpy as np
 
 
 class DataManager:
@@ -34,6 +36,11 @@ class DataManager:
     wcs_column_name = "wavelength"
     """Name of the table column containing the wavelength information."""
 
+    flux_dtype = np.float32
+    """On-disk dtype of the flux and variance (`None` to keep in-memory)."""
+    mask_dtype = np.uint16
+    """On-disk dtype of the mask (`None` to keep in-memory)."""
+
     # The version of the FITS file format produced by this class.
     FORMAT_VERSION = 1
 
@@ -85,7 +92,7 @@ class DataManager:
         """Return the primary HDU built from a Spectrum."""
 
         hdu = astropy.io.fits.PrimaryHDU(
-            data=self.spectrum.flux, header=self.make_fits_header()
+            data=as_dtype(self.spectrum.flux, self.flux_dtype), header=self.make_fits_header()
         )
         return hdu
 
@@ -95,14 +102,14 @@ class DataManager:
         hdr_mask["EXTTYPE"] = 'MASK    '
         hdr_mask["EXTNAME"] = 'MASK    '
         hdu_mask = astropy.io.fits.ImageHDU(
-            data=self.spectrum.mask, header=hdr_mask
+            data=as_dtype(self.spectrum.mask, self.mask_dtype), header=hdr_mask
         )
 
         hdr_variance = astropy.io.fits.Header()
         hdr_variance["EXTTYPE"] = 'VARIANCE'
         hdr_variance["EXTNAME"] = 'VARIANCE'
         hdu_variance = astropy.io.fits.ImageHDU(
-            data=self.spectrum.variance, header=hdr_variance
+            data=as_dtype(self.spectrum.variance, self.flux_dtype), header=hdr_variance
         )
         return hdu_mask, hdu_variance
 
@@ -127,3 +134,43 @@ class DataManager:
         # match the value of PV1_1
         hdu = astropy.io.fits.BinTableHDU(table, name=self.wcs_table_name, ver=1)
         return hdu
+
+
+def as_dtype(array, dtype):
+    """Return an array converted to ``dtype``, checking that integers fit.
+
+    The input is never modified; it is returned as-is if it already has
+    ``dtype``, and otherwise converted to a new array.
+
+    Parameters
+    ----------
+    array : `numpy.ndarray` or `None`
+        Array to convert.
+    dtype : `numpy.dtype` or `None`
+        dtype to convert to; `None` to leave ``array`` as it is.
+
+    Returns
+    -------
+    array : `numpy.ndarray` or `None`
+        The converted array.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``dtype`` is an integer type that cannot hold every
+        value in ``array``, e.g. when narrowing a mask with high bits set.
+    """
+    if array is None or dtype is None:
+        return array
+
+    dtype = np.dtype(dtype)
+    array = np.asarray(array)
+    if array.dtype == dtype:
+        return array
+
+    if dtype.kind in "iu" and array.size > 0:
+        info = np.iinfo(dtype)
+        if array.min() < info.min or array.max() > info.max:
+            raise ValueError(f"Values in [{array.min()}, {array.max()}] do not fit in {dtype}")
+
+    return array.astype(dtype)
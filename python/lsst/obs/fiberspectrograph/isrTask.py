@@ -29,6 +29,12 @@ import lsst.pipe.base.connectionTypes as cT
 
 import lsst.ip.isr
 
+from .calibCache import CalibrationCache
+
+# Shared by all IsrTask instances in this process, as executors construct a
+# new task for every quantum.
+_calibCache = CalibrationCache(maxSize=8)
+
 
 class IsrTaskConnections(lsst.ip.isr.isrTask.IsrTaskConnections):
     ccdExposure = cT.Input(
@@ -44,6 +50,13 @@ class IsrTaskConnections(lsst.ip.isr.isrTask.IsrTaskConnections):
         dimensions=["instrument", "detector"],
         isCalibration=True,
     )
+    spectrumBias = cT.PrerequisiteInput(
+        name="bias",
+        doc="Input bias calibration, subtracted by this task rather than by lsst.ip.isr.",
+        storageClass="FiberSpectrum",
+        dimensions=["instrument", "detector"],
+        isCalibration=True,
+    )
     outputExposure = cT.Output(
         name="spectrum",
         doc="Corrected spectrum.",
@@ -54,6 +67,9 @@ class IsrTaskConnections(lsst.ip.isr.isrTask.IsrTaskConnections):
     def __init__(self, *, config=None):
         super().__init__(config=config)
 
+        if config.doSpectrumBias is not True:
+            del self.spectrumBias
+
 
 class IsrTaskConfig(lsst.ip.isr.IsrTaskConfig, pipelineConnections=IsrTaskConnections):
     """Configuration parameters for IsrTask.
@@ -66,6 +82,52 @@ class IsrTaskConfig(lsst.ip.isr.IsrTaskConfig, pipelineConnections=IsrTaskConnec
         "but camera-specific ISR tasks will override it",
         default="rawSpectrum",
     )
+    fluxDtype = pexConfig.ChoiceField(
+        dtype=str,
+        doc="dtype of the flux and variance while processing.  The dtype written to disk is "
+        "set separately, by DataManager.",
+        default="float32",
+        allowed={
+            "float32": "Single precision; halves the memory needed per spectrum.",
+            "float64": "Double precision.",
+        },
+    )
+    maskDtype = pexConfig.ChoiceField(
+        dtype=str,
+        doc="dtype of the mask while processing.",
+        default="uint16",
+        allowed={
+            "uint16": "Room for 16 mask planes.",
+            "int32": "The dtype of an afw Mask.",
+        },
+    )
+    doSpectrumBias = pexConfig.Field(
+        dtype=bool,
+        doc="Subtract the bias spectrum?  Use this rather than doBias, as the lsst.ip.isr "
+        "bias correction only supports afw Exposures.",
+        default=False,
+    )
+    doCalibCache = pexConfig.Field(
+        dtype=bool,
+        doc="Cache the bias spectrum (with its flux converted to float64) in memory, so that "
+        "quanta run in the same process do not reload it from the butler?",
+        default=False,
+    )
+    calibCacheSize = pexConfig.Field(
+        dtype=int,
+        doc="Minimum number of entries kept in the in-process calibration cache.  The cache is "
+        "shared by the whole process, and is grown to the largest size any task asks for.",
+        default=8,
+        check=lambda x: x > 0,
+    )
+
+    def validate(self):
+        super().validate()
+
+        if self.doBias and self.doSpectrumBias:
+            raise ValueError("doBias and doSpectrumBias are mutually exclusive; use doSpectrumBias.")
+        if self.doCalibCache and not self.doSpectrumBias:
+            raise ValueError("doCalibCache only caches the bias spectrum, so requires doSpectrumBias.")
 
 
 class IsrTask(lsst.ip.isr.IsrTask):
@@ -97,16 +159,98 @@ class IsrTask(lsst.ip.isr.IsrTask):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self._cachedBias = None
+
+    def runQuantum(self, butlerQC, inputRefs, outputRefs):
+        biasRef = getattr(inputRefs, "spectrumBias", None)
+        if not self.config.doCalibCache or biasRef is None:
+            return super().runQuantum(butlerQC, inputRefs, outputRefs)
+
+        # The cache is shared by every task in the process; only ever grow it
+        # so that tasks configured with different sizes cannot evict each
+        # other's entries.
+        _calibCache.reserve(self.config.calibCacheSize)
+
+        self._cachedBias, hit = _calibCache.get(("bias", biasRef.id),
+                                                lambda: self._prepareBias(butlerQC.get(biasRef)))
+        self.metadata["calibCacheHits"] = int(hit)
+        self.metadata["calibCacheMisses"] = int(not hit)
+
+        # Remove the bias from the refs the butler reads; run() uses the
+        # cached copy instead.
+        del inputRefs.spectrumBias
+        try:
+            return super().runQuantum(butlerQC, inputRefs, outputRefs)
+        finally:
+            inputRefs.spectrumBias = biasRef
+            self._cachedBias = None
+
+    def run(self, ccdExposure, *, spectrumBias=None, **kwargs):
+        if spectrumBias is None:
+            spectrumBias = self._cachedBias
+        if self.config.doSpectrumBias and spectrumBias is None:
+            raise RuntimeError("Must supply a bias spectrum if config.doSpectrumBias=True.")
+
+        result = super().run(ccdExposure, **kwargs)
+
+        if self.config.doSpectrumBias:
+            self.log.info("Applying bias correction.")
+            self.biasCorrection(result.outputExposure, spectrumBias)
+
+        return result
+
+    def biasCorrection(self, spectrum, bias):
+        """Subtract a bias from a spectrum in place.
+
+        The subtraction is done in float64, and the result converted back to
+        the dtype of the spectrum's flux.
+
+        Parameters
+        ----------
+        spectrum : `~lsst.obs.fiberspectrograph.FiberSpectrum`
+            Spectrum to correct.
+        bias : `~lsst.obs.fiberspectrograph.FiberSpectrum`
+            Bias to subtract.
+        """
+        if spectrum.flux.shape != bias.flux.shape:
+            raise RuntimeError(f"Bias shape {bias.flux.shape} does not match "
+                               f"spectrum shape {spectrum.flux.shape}")
+
+        flux = np.subtract(spectrum.flux, bias.flux, dtype=np.float64)
+        spectrum.flux = flux.astype(spectrum.flux.dtype, copy=False)
+
+    @staticmethod
+    def _prepareBias(bias):
+        """Convert a bias to the form kept in the calibration cache.
+
+        Parameters
+        ----------
+        bias : `~lsst.obs.fiberspectrograph.FiberSpectrum`
+            Bias as read from the butler.
+
+        Returns
+        -------
+        bias : `~lsst.obs.fiberspectrograph.FiberSpectrum`
+            The same bias, with its flux converted to float64 once rather
+            than on every use.
+        """
+        bias.flux = np.asarray(bias.flux, dtype=np.float64)
+        return bias
 
     def ensureExposure(self, inputExposure, *args, **kwargs):
         return inputExposure
 
     def convertIntToFloat(self, ccdExposure):
+        # Apply the processing dtypes; arrays already of the right type
+        # are not copied.
+        ccdExposure.applyDtypes(self.config.fluxDtype, self.config.maskDtype)
         return ccdExposure
 
     def maskAmplifier(self, ccdExposure, amp, defects):
         flux = ccdExposure.flux
 
+        # The threshold is a plain accessor on the camera geometry, so there
+        # is nothing worth caching here.
         saturated = flux > amp.getSaturation()
         flux[saturated] = np.nan
         ccdExposure.mask[saturated] |= ccdExposure.getPlaneBitMask(self.config.saturatedMaskName)
@@ -0,0 +1,421 @@
+# This file is part of obs_fiberspectrograph
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["OutlierRejectionTask", "OutlierRejectionTaskConfig"]
+
+import warnings
+
+import numpy as np
+
+import lsst.pex.config as pexConfig
+import lsst.pipe.base as pipeBase
+import lsst.pipe.base.connectionTypes as cT
+
+
+class OutlierRejectionTaskConnections(pipeBase.PipelineTaskConnections,
+                                      dimensions=("instrument", "detector", "day_obs")):
+    inputSpectra = cT.Input(
+        name="spectrum",
+        doc="Time series of spectra of the same source to search for outliers.",
+        storageClass="FiberSpectrum",
+        dimensions=["instrument", "exposure", "detector"],
+        multiple=True,
+    )
+    outputSpectra = cT.Output(
+        name="outlierMaskedSpectrum",
+        doc="Spectra with outlier pixels masked.",
+        storageClass="FiberSpectrum",
+        dimensions=["instrument", "exposure", "detector"],
+        multiple=True,
+    )
+
+
+class OutlierRejectionTaskConfig(pipeBase.PipelineTaskConfig,
+                                 pipelineConnections=OutlierRejectionTaskConnections):
+    """Configuration parameters for OutlierRejectionTask.
+    """
+    windowSize = pexConfig.Field(
+        dtype=int,
+        doc="Number of consecutive spectra used to compute the rolling median of each pixel; "
+        "must be odd.  The window is shifted inwards at the ends of the series.",
+        default=21,
+        check=lambda x: x >= 3 and x % 2 == 1,
+    )
+    noiseWindowSize = pexConfig.Field(
+        dtype=int,
+        doc="Number of consecutive spectra over which the noise of each pixel is estimated.",
+        default=101,
+        check=lambda x: x >= 1,
+    )
+    noisePixelWindowSize = pexConfig.Field(
+        dtype=int,
+        doc="Number of neighbouring pixels over which the noise of each pixel is estimated.",
+        default=15,
+        check=lambda x: x >= 1,
+    )
+    nNoiseIter = pexConfig.Field(
+        dtype=int,
+        doc="Number of sigma-clipping iterations used to estimate the noise.",
+        default=3,
+        check=lambda x: x >= 1,
+    )
+    nSigma = pexConfig.Field(
+        dtype=float,
+        doc="Pixels deviating from the rolling median by more than this many sigma are flagged.",
+        default=5.0,
+    )
+    minSigma = pexConfig.Field(
+        dtype=float,
+        doc="Lower limit on the estimated sigma, in flux units (ADU), to avoid flagging "
+        "quantisation noise in pixels that are almost constant.",
+        default=0.5,
+    )
+    minSpectra = pexConfig.Field(
+        dtype=int,
+        doc="Minimum number of spectra needed to search for outliers.",
+        default=5,
+        check=lambda x: x >= 3,
+    )
+    maskPlaneName = pexConfig.Field(
+        dtype=str,
+        doc="Name of the mask plane to set for outlier pixels.",
+        default="CR",
+    )
+    maxChunkBytes = pexConfig.Field(
+        dtype=int,
+        doc="Approximate upper limit on the size of the temporary arrays used per chunk of pixels.",
+        default=256*1024**2,
+    )
+
+
+class OutlierRejectionTask(pipeBase.PipelineTask):
+    """Flag outlier pixels, such as cosmic rays and single-pixel glitches,
+    in a time series of spectra of the same source.
+
+    Each pixel of each spectrum is compared with the median of that pixel
+    in the other spectra of a window of ``windowSize`` neighbouring
+    spectra.  The noise of these residuals is estimated, with sigma
+    clipping, over a box of ``noiseWindowSize`` spectra by
+    ``noisePixelWindowSize`` pixels, so that it follows changes in flux
+    along the series and the spectrum, and pixels deviating by more than
+    ``nSigma`` times the noise are flagged.  The calculation is vectorised
+    over a stack of all the spectra, processed in chunks of pixels so as to
+    bound the memory used.
+
+    A quantum holds one night's spectra from one spectrograph; the data query
+    should be restricted (e.g. by ``exposure.science_program``) so that
+    these are all of the same source and configuration.
+
+    Parameters
+    ----------
+    kwargs : `dict`, optional
+        Keyword arguments passed on to the Task constructor.
+    """
+    ConfigClass = OutlierRejectionTaskConfig
+    _DefaultName = "outlierRejection"
+
+    def runQuantum(self, butlerQC, inputRefs, outputRefs):
+        # Exposure IDs increase with time, so sorting by them gives a time
+        # series.
+        spectrumRefs = sorted(inputRefs.inputSpectra, key=lambda ref: ref.dataId["exposure"])
+        outputRefsByExposure = {ref.dataId["exposure"]: ref for ref in outputRefs.outputSpectra}
+
+        # Read each spectrum once.  Its flux is moved into the stack as it is
+        # read, so only one copy of the fluxes is held; the rest of the
+        # spectrum is kept to be masked and written.
+        spectra = []
+        fluxShapes = []
+
+        def readFluxes():
+            for ref in spectrumRefs:
+                spectrum = butlerQC.get(ref)
+                spectra.append(spectrum)
+                fluxShapes.append((spectrum.flux.shape, spectrum.flux.dtype))
+                yield spectrum.flux
+                spectrum.flux = None
+
+        stack = self.stackFluxes(readFluxes(), len(spectrumRefs))
+        outliers = self.findOutliers(stack)
+
+        for ref, spectrum, (shape, dtype), flux, isOutlier in zip(spectrumRefs, spectra, fluxShapes,
+                                                                  stack, outliers):
+            spectrum.flux = flux.reshape(shape).astype(dtype, copy=False)
+            self.maskOutliers(spectrum, isOutlier)
+            butlerQC.put(spectrum, outputRefsByExposure[ref.dataId["exposure"]])
+
+        self._logOutliers(outliers)
+
+    def run(self, spectra):
+        """Flag outlier pixels in a time-ordered sequence of spectra.
+
+        Parameters
+        ----------
+        spectra : `list` of `~lsst.obs.fiberspectrograph.FiberSpectrum`
+            Spectra of the same source and configuration, in time order.
+            Their masks are updated in place.
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            Result struct with components:
+
+            ``outputSpectra``
+                The input spectra with outliers masked
+                (`list` of `~lsst.obs.fiberspectrograph.FiberSpectrum`).
+            ``nOutliers``
+                Number of pixels flagged in each spectrum
+                (`numpy.ndarray` of `int`).
+        """
+        stack = self.stackFluxes((spectrum.flux for spectrum in spectra), len(spectra))
+        outliers = self.findOutliers(stack)
+
+        for spectrum, isOutlier in zip(spectra, outliers):
+            self.maskOutliers(spectrum, isOutlier)
+
+        return pipeBase.Struct(outputSpectra=spectra, nOutliers=self._logOutliers(outliers))
+
+    @staticmethod
+    def stackFluxes(fluxes, nSpectra):
+        """Stack the fluxes of a series of spectra.
+
+        Parameters
+        ----------
+        fluxes : iterable of `numpy.ndarray`
+            Fluxes of the spectra, in time order.
+        nSpectra : `int`
+            Number of spectra.
+
+        Returns
+        -------
+        stack : `numpy.ndarray`
+            Fluxes, shape ``(nSpectra, nPixels)``; float32, or float64 if the
+            fluxes are, so they can be recovered exactly from the stack.
+
+        Raises
+        ------
+        ValueError
+            Raised if the spectra do not all have the same shape.
+        """
+        stack = None
+        for i, flux in enumerate(fluxes):
+            if stack is None:
+                shape = flux.shape
+                stack = np.empty((nSpectra, flux.size), dtype=np.result_type(flux.dtype, np.float32))
+            elif flux.shape != shape:
+                raise ValueError(f"Spectra have different shapes: {flux.shape} and {shape}")
+            stack[i] = flux.ravel()
+
+        if stack is None:
+            stack = np.empty((0, 0), dtype=np.float32)
+        return stack
+
+    def maskOutliers(self, spectrum, isOutlier):
+        """Set the outlier mask plane in a spectrum.
+
+        Parameters
+        ----------
+        spectrum : `~lsst.obs.fiberspectrograph.FiberSpectrum`
+            Spectrum to update in place.
+        isOutlier : `numpy.ndarray` of `bool`
+            Flattened outlier flags for the spectrum.
+        """
+        if spectrum.mask is None:
+            spectrum.mask = np.zeros(spectrum.flux.shape, dtype=spectrum.maskDtype)
+        spectrum.mask[isOutlier.reshape(spectrum.mask.shape)] |= \
+            spectrum.getPlaneBitMask(self.config.maskPlaneName)
+
+    def findOutliers(self, stack):
+        """Find outliers in a stack of spectra.
+
+        Parameters
+        ----------
+        stack : `numpy.ndarray`
+            Fluxes, shape ``(nSpectra, nPixels)``, in time order.
+
+        Returns
+        -------
+        outliers : `numpy.ndarray` of `bool`
+            `True` for outlier pixels; same shape as ``stack``.
+        """
+        nSpectra, nPixels = stack.shape
+        outliers = np.zeros(stack.shape, dtype=bool)
+        if nSpectra < self.config.minSpectra:
+            self.log.warning("Only %d spectra provided (minimum %d); not searching for outliers.",
+                             nSpectra, self.config.minSpectra)
+            return outliers
+
+        # The median window must be odd and no longer than the series
+        window = min(self.config.windowSize, nSpectra - 1 + nSpectra % 2)
+        pixelWindow = min(self.config.noisePixelWindowSize, nPixels)
+
+        # Peak temporary memory per pixel, in bytes: the larger of computing
+        # the residuals (the windowed partition's float32 copy, plus the
+        # medians) and estimating the noise (two float64 cumsum, concatenate
+        # and take passes per axis of the box sums), plus a few int64 index
+        # arrays.
+        bytesPerPixel = max(4*(nSpectra - window + 1)*window + 32*nSpectra, 80*nSpectra) + 300
+        # Each chunk also includes up to pixelWindow - 1 pixels of halo
+        chunkSize = max(1, self.config.maxChunkBytes//bytesPerPixel - (pixelWindow - 1))
+
+        for begin in range(0, nPixels, chunkSize):
+            end = min(begin + chunkSize, nPixels)
+            # Include the pixels needed for the noise estimates at the edges
+            # of the chunk, so chunking does not change the result.
+            lo = min(max(begin - pixelWindow//2, 0), nPixels - pixelWindow)
+            hi = min(max(end - 1 - pixelWindow//2, 0), nPixels - pixelWindow) + pixelWindow
+
+            isOutlier = self._findChunkOutliers(stack[:, lo:hi], window, pixelWindow)
+            outliers[:, begin:end] = isOutlier[:, begin - lo:end - lo]
+
+        return outliers
+
+    def _findChunkOutliers(self, chunk, window, pixelWindow):
+        """Find outliers in a chunk of pixels of a stack of spectra.
+
+        Doing this in its own method frees each chunk's temporaries before
+        the next chunk is processed.
+
+        Parameters
+        ----------
+        chunk : `numpy.ndarray`
+            Fluxes, shape ``(nSpectra, nPixels)``.
+        window : `int`
+            Odd number of spectra in the rolling median.
+        pixelWindow : `int`
+            Number of pixels in the box used to estimate the noise.
+
+        Returns
+        -------
+        isOutlier : `numpy.ndarray` of `bool`
+            `True` for outlier pixels; same shape as ``chunk``.
+        """
+        residuals = self._computeResiduals(chunk, window)
+        sigma = self._estimateNoise(residuals, pixelWindow)
+        with np.errstate(invalid="ignore"):
+            return np.abs(residuals) > self.config.nSigma*sigma
+
+    @staticmethod
+    def _computeResiduals(chunk, window):
+        """Return the residuals of each pixel from the median of the other
+        spectra in its window.
+
+        Leaving the pixel itself out of the median keeps an outlier from
+        pulling the median towards itself, and makes the residuals of
+        well-behaved pixels independent of the pixel's own noise.
+
+        Parameters
+        ----------
+        chunk : `numpy.ndarray`
+            Fluxes, shape ``(nSpectra, nPixels)``.
+        window : `int`
+            Odd number of spectra in each window, including the pixel itself.
+
+        Returns
+        -------
+        residuals : `numpy.ndarray`
+            Residuals, same shape as ``chunk``; NaN where ``chunk`` is NaN.
+        """
+        nSpectra = chunk.shape[0]
+        starts = np.clip(np.arange(nSpectra) - window//2, 0, nSpectra - window)
+
+        # Replace NaNs (e.g. from saturation) by the median of the pixel over
+        # the series, so they do not bias the windowed medians.
+        filled = chunk
+        isNan = np.isnan(chunk)
+        if isNan.any():
+            columns = isNan.any(axis=0)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)     # All-NaN columns
+                fill = np.nanmedian(chunk[:, columns], axis=0)
+            filled = chunk.copy()
+            filled[:, columns] = np.where(isNan[:, columns], fill, chunk[:, columns])
+
+        # The median of the window without one element only needs the three
+        # middle order statistics of the whole window, and whether the
+        # element is below, at, or above the middle one.
+        m = window//2
+        windows = np.lib.stride_tricks.sliding_window_view(filled, window, axis=0)
+        order = np.partition(windows, [m - 1, m, m + 1], axis=-1)[..., m - 1:m + 2][starts]
+        below, middle, above = order[..., 0], order[..., 1], order[..., 2]
+        median = np.where(filled < middle, 0.5*(middle + above),
+                          np.where(filled > middle, 0.5*(below + middle), 0.5*(below + above)))
+
+        return chunk - median
+
+    def _estimateNoise(self, residuals, pixelWindow):
+        """Estimate the noise of the residuals over a sliding box, with
+        sigma clipping.
+
+        Parameters
+        ----------
+        residuals : `numpy.ndarray`
+            Residuals, shape ``(nSpectra, nPixels)``.
+        pixelWindow : `int`
+            Number of pixels in the box.
+
+        Returns
+        -------
+        sigma : `numpy.ndarray`
+            Noise for each residual; same shape as ``residuals``.
+        """
+        finite = np.isfinite(residuals)
+        squares = np.square(np.where(finite, residuals, 0.0), dtype=np.float64)
+
+        good = finite
+        for _ in range(self.config.nNoiseIter):
+            n = _boxSum(good, self.config.noiseWindowSize, pixelWindow)
+            sumSquares = _boxSum(np.where(good, squares, 0.0), self.config.noiseWindowSize, pixelWindow)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sigma = np.maximum(np.sqrt(sumSquares/n), self.config.minSigma)
+                good = finite & (np.abs(residuals) <= self.config.nSigma*sigma)
+
+        return sigma
+
+    def _logOutliers(self, outliers):
+        """Log and record the number of outliers, returning the number in
+        each spectrum.
+        """
+        nOutliers = outliers.sum(axis=1)
+        self.log.info("Flagged %d outlier pixels in %d spectra.", nOutliers.sum(), len(nOutliers))
+        self.metadata["nOutliers"] = int(nOutliers.sum())
+        return nOutliers
+
+
+def _windowSum(array, window, axis):
+    """Sum an array over a sliding window along one axis.
+
+    The window is shifted inwards at the ends of the axis, so every sum is
+    over ``window`` elements (or the whole axis, if that is shorter).  The
+    sums are accumulated in float64.
+    """
+    n = array.shape[axis]
+    window = min(window, n)
+    starts = np.clip(np.arange(n) - window//2, 0, n - window)
+
+    cumsum = np.cumsum(array, axis=axis, dtype=np.float64)
+    zeros = np.zeros_like(np.take(cumsum, [0], axis=axis))
+    cumsum = np.concatenate([zeros, cumsum], axis=axis)
+    return np.take(cumsum, starts + window, axis=axis) - np.take(cumsum, starts, axis=axis)
+
+
+def _boxSum(array, nSpectra, nPixels):
+    """Sum a ``(nSpectra, nPixels)`` array over a sliding box."""
+    return _windowSum(_windowSum(array, nSpectra, axis=0), nPixels, axis=1)
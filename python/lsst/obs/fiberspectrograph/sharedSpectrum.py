@@ -0,0 +1,109 @@
+# This file is part of obs_fiberspectrograph.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ("SharedFiberSpectrum",)
+
+import pickle
+from multiprocessing import shared_memory
+
+
+class SharedFiberSpectrum:
+    """A handle to a `~lsst.obs.fiberspectrograph.FiberSpectrum` whose
+    arrays are held in shared memory.
+
+    `multiprocessing` pickles task arguments without a ``buffer_callback``,
+    so arrays passed directly are copied through the pipe.  Pass this handle
+    instead: it pickles to the name of a shared memory block and the small
+    remainder of the spectrum's protocol 5 pickle, and `get` rebuilds the
+    spectrum with its arrays viewing the shared memory, without copying.
+
+    The process that creates the handle owns the shared memory and must
+    call `unlink` (or use the handle as a context manager) when all the
+    workers are done with it.  Arrays obtained with `get` share memory with
+    every other process using the handle, so changes to them are visible to
+    all of them.
+
+    Parameters
+    ----------
+    spectrum : `~lsst.obs.fiberspectrograph.FiberSpectrum`
+        Spectrum to copy into shared memory.
+    """
+
+    _ALIGNMENT = 64
+    """Alignment, in bytes, of each array in the shared memory block."""
+
+    def __init__(self, spectrum):
+        buffers = []
+        self._payload = pickle.dumps(spectrum, protocol=5, buffer_callback=buffers.append)
+
+        self._layout = []
+        size = 0
+        for buffer in buffers:
+            nbytes = buffer.raw().nbytes
+            self._layout.append((size, nbytes))
+            size += -(-nbytes//self._ALIGNMENT)*self._ALIGNMENT
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self._name = self._shm.name
+        for buffer, (offset, nbytes) in zip(buffers, self._layout):
+            self._shm.buf[offset:offset + nbytes] = buffer.raw()
+
+    def __getstate__(self):
+        return dict(_name=self._name, _payload=self._payload, _layout=self._layout)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+    def get(self):
+        """Return the spectrum, with its arrays in shared memory.
+
+        Returns
+        -------
+        spectrum : `~lsst.obs.fiberspectrograph.FiberSpectrum`
+            The spectrum.  It keeps the shared memory attached for as long
+            as it exists.
+        """
+        if self._shm is None:
+            try:
+                self._shm = shared_memory.SharedMemory(name=self._name, track=False)
+            except TypeError:
+                # track was added in python 3.13
+                self._shm = shared_memory.SharedMemory(name=self._name)
+
+        buffers = [self._shm.buf[offset:offset + nbytes] for offset, nbytes in self._layout]
+        spectrum = pickle.loads(self._payload, buffers=buffers)
+        spectrum._sharedMemory = self._shm
+        return spectrum
+
+    def unlink(self):
+        """Free the shared memory once every process has finished with it.
+
+        Only the process that created the handle should call this.
+        """
+        shm = self._shm if self._shm is not None else shared_memory.SharedMemory(name=self._name)
+        shm.unlink()
@@ -25,7 +25,7 @@ import numpy as np
 import astropy.io.fits
 import astropy.units as u
 from ._instrument import FiberSpectrograph
-from .data_manager import DataManager
+from .data_manager import DataManager, as_dtype
 import lsst.afw.image as afwImage
 from astro_metadata_translator import ObservationInfo
 
@@ -41,23 +41,107 @@ class FiberSpectrum:
         Spectrum flux.
     md: `dict`
         Dictionary of the spectrum headers.
-    detectorId : `int`
-        Optional Detector ID for this data.
+    detectorId : `int`, optional
+        Detector ID for this data; taken from the header if `None`.
     """
 
-    def __init__(self, wavelength, flux, md=None, detectorId=0, mask=None, variance=None):
+    fluxDtype = np.float32
+    """Default in-memory dtype of the flux and variance (see `applyDtypes`).
+    The on-disk dtypes are set by `DataManager`."""
+
+    maskDtype = np.uint16
+    """Default in-memory dtype of the mask (see `applyDtypes`)."""
+
+    def __init__(self, wavelength, flux, md=None, detectorId=None, mask=None, variance=None):
         self.wavelength = wavelength
         self.flux = flux
         self.metadata = md
 
         self.info = ObservationInfo(md)
+        if detectorId is None:
+            detectorId = self.info.detector_num
         self.detector = FiberSpectrograph().getCamera()[detectorId]
 
-        mask_temp = afwImage.MaskX(1, 1)
-        self.getPlaneBitMask = mask_temp.getPlaneBitMask  # ughh, awful Mask API
         self.mask = mask
         self.variance = variance
 
+    def __reduce_ex__(self, protocol):
+        """Pickle only the arrays and the header.
+
+        The detector, `~astro_metadata_translator.ObservationInfo` and mask
+        plane lookup are rebuilt by the constructor on unpickling.  The
+        arrays are handed to pickle as plain `numpy.ndarray` objects, so with
+        protocol 5 and a ``buffer_callback`` they are passed as out-of-band
+        buffers rather than copied into the pickle stream.  `multiprocessing`
+        does not use a ``buffer_callback``; use
+        `~lsst.obs.fiberspectrograph.SharedFiberSpectrum` to pass spectra to
+        worker processes without copying their arrays.
+        """
+        wavelength = self.wavelength
+        unit = None
+        if isinstance(wavelength, u.Quantity):
+            unit = wavelength.unit.to_string()
+            wavelength = wavelength.value
+
+        # ndarray subclasses (e.g. np.memmap from astropy) are always pickled
+        # in-band by numpy, so hand over base-class arrays.
+        arrays = [a if a is None else np.asarray(a)
+                  for a in (wavelength, self.flux, self.mask, self.variance)]
+
+        return (_unpickleFiberSpectrum,
+                (type(self), *arrays, unit, self.metadata, self.detector.getId()))
+
+    def getPlaneBitMask(self, names):
+        """Get the bit mask for one or more mask planes.
+
+        Parameters
+        ----------
+        names : `str` or `list` of `str`
+            Names of the mask planes.
+
+        Returns
+        -------
+        bitMask : `int`
+            Bit mask for the planes.
+
+        Raises
+        ------
+        ValueError
+            Raised if the bit mask does not fit in the dtype of the mask.
+        """
+        bitMask = afwImage.MaskX(1, 1).getPlaneBitMask(names)  # ughh, awful Mask API
+
+        dtype = self.mask.dtype if self.mask is not None else np.dtype(self.maskDtype)
+        if bitMask > np.iinfo(dtype).max:
+            raise ValueError(f"Bit mask {bitMask:#x} for {names} does not fit in a {dtype} mask")
+        return bitMask
+
+    def applyDtypes(self, fluxDtype=None, maskDtype=None):
+        """Convert the flux, variance and mask to the in-memory dtypes in
+        place.
+
+        Arrays that already have the right dtype are not copied.
+
+        Parameters
+        ----------
+        fluxDtype : `numpy.dtype` or `str`, optional
+            dtype of the flux and variance; ``self.fluxDtype`` if `None`.
+        maskDtype : `numpy.dtype` or `str`, optional
+            dtype of the mask; ``self.maskDtype`` if `None`.
+
+        Raises
+        ------
+        ValueError
+            Raised if the mask cannot be narrowed to ``maskDtype`` without
+            losing bits.
+        """
+        fluxDtype = self.fluxDtype if fluxDtype is None else fluxDtype
+        maskDtype = self.maskDtype if maskDtype is None else maskDtype
+
+        self.flux = as_dtype(self.flux, fluxDtype)
+        self.variance = as_dtype(self.variance, fluxDtype)
+        self.mask = as_dtype(self.mask, maskDtype)
+
     def getDetector(self):
         """Get fiber spectrograph detector."
         """
@@ -87,6 +171,9 @@ class FiberSpectrum:
     def readFits(cls, path):
         """Read a Spectrum from disk."
 
+        The flux, variance and mask are converted to ``cls.fluxDtype`` and
+        ``cls.maskDtype``.
+
         Parameters
         ----------
         path : `str`
@@ -108,20 +195,24 @@ class FiberSpectrum:
 
             wavelength = u.Quantity(wavelength, u.Unit(md["CUNIT1"]), copy=False)
 
-            mask_temp = afwImage.MaskX(1, 1)
-            mask = np.zeros(flux.shape, dtype=mask_temp.array.dtype)
-            variance = np.zeros_like(flux)
+            mask = np.zeros(flux.shape, dtype=cls.maskDtype)
+            variance = np.zeros(flux.shape, dtype=cls.fluxDtype)
             if len(fitsfile) == 4:
                 mask = fitsfile[2].data
                 variance = fitsfile[3].data
         else:
             raise ValueError(f"FORMAT_V has changed from 1 to {format_v}")
 
-        return cls(wavelength, flux, md=md, mask=mask, variance=variance)
+        spectrum = cls(wavelength, flux, md=md, mask=mask, variance=variance)
+        spectrum.applyDtypes()
+        return spectrum
 
     def writeFits(self, path):
         """Write a Spectrum to disk.
 
+        The flux, variance and mask are written with the on-disk dtypes of
+        `DataManager`; the spectrum itself is not modified.
+
         Parameters
         ----------
         path : `str`
@@ -130,3 +221,12 @@ class FiberSpectrum:
         hdl = DataManager(self).make_hdulist()
 
         hdl.writeto(path)
+
+
+def _unpickleFiberSpectrum(cls, wavelength, flux, mask, variance, unit, md, detectorId):
+    """Reconstruct a `FiberSpectrum` pickled by `FiberSpectrum.__reduce_ex__`.
+    """
+    if unit is not None:
+        wavelength = u.Quantity(wavelength, u.Unit(unit), copy=False)
+
+    return cls(wavelength, flux, md=md, detectorId=detectorId, mask=mask, variance=variance)
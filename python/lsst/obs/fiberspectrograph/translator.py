@@ -29,13 +29,24 @@ class FiberSpectrographTranslator(LsstBaseTranslator):
     default_resource_root = os.path.join(getPackageDir("obs_fiberspectrograph"), "corrections")
     """Default resource path root to use to locate header correction files."""
 
-    DETECTOR_MAX = 1
+    DETECTOR_MAX = 3
+    """Changing this changes ``detector_exposure_id`` and the instrument's
+    registered ``detector_max``; see the package documentation."""
+
+    _CONTROLLERS = "OCHPQ"
+    """Controllers, in the order of their year offsets in exposure IDs."""
+
+    _detector_map = {
+        "FiberSpectrograph.Broad": (0, "ccd0"),
+        "FiberSpectrograph.Red": (1, "ccd1"),
+        "FiberSpectrograph.Blue": (2, "ccd2"),
+    }
+    """Mapping from INSTRUME to detector number and name.  Must be kept in
+    step with the CCDs in ``policy/fiberSpectrograph.yaml``."""
 
     _const_map = {
-        # TODO: DM-43041 DATE, detector name and controller should be put
+        # TODO: DM-43041 DATE and controller should be put
         # in file header and add to mapping
-        "detector_num": 0,
-        "detector_name": "ccd0",
         "object": None,
         "physical_filter": "empty",
         "detector_group": "None",
@@ -77,13 +88,22 @@ class FiberSpectrographTranslator(LsstBaseTranslator):
             otherwise.
         """
 
-        # TODO: DM-43041 need to be updated with new fiber spec
-        return "INSTRUME" in header and header["INSTRUME"] in ["FiberSpectrograph.Broad"]
+        return "INSTRUME" in header and header["INSTRUME"] in cls._detector_map
 
     @cache_translation
     def to_instrument(self):
         return "FiberSpec"
 
+    @cache_translation
+    def to_detector_num(self):
+        self._used_these_cards("INSTRUME")
+        return self._detector_map[self._header["INSTRUME"]][0]
+
+    @cache_translation
+    def to_detector_name(self):
+        self._used_these_cards("INSTRUME")
+        return self._detector_map[self._header["INSTRUME"]][1]
+
     @cache_translation
     def to_datetime_begin(self):
         self._used_these_cards("DATE-BEG")
@@ -112,13 +132,20 @@ class FiberSpectrographTranslator(LsstBaseTranslator):
             return (darkTime, dict(unit=u.s))
         return self.to_exposure_time()
 
-    @staticmethod
-    def compute_exposure_id(dayobs, seqnum, controller=None):
+    @classmethod
+    def compute_exposure_id(cls, dayobs, seqnum, controller=None, spectrograph=0):
         """Helper method to calculate the exposure_id.
 
+        The exposure ID is ``YYYYMMDDnnnnn`` with ``1000*(c + 5*s)`` added to
+        the year, where ``c`` is the index of the controller in ``OCHPQ``
+        (0 if there is none) and ``s`` the detector number of the
+        spectrograph.  As long as the year itself is below 3000, each
+        controller and spectrograph therefore has its own block of 1000
+        years, and the IDs cannot overlap.
+
         Parameters
         ----------
-        dayobs : `str`
+        dayobs : `str` or `int`
             Day of observation in either YYYYMMDD or YYYY-MM-DD format.
             If the string looks like ISO format it will be truncated before the
             ``T`` before being handled.
@@ -132,6 +159,11 @@ class FiberSpectrographTranslator(LsstBaseTranslator):
             `None` indicates that the controller is not relevant to the
             exposure ID calculation (generally this is the case for test
             stand data).
+        spectrograph : `int`, optional
+            Detector number of the spectrograph.  Each spectrograph numbers
+            its exposures independently, so 5000 times this is added to the
+            year component to keep their exposure IDs distinct; the Broad
+            spectrograph (0) is unchanged.
 
         Returns
         -------
@@ -147,6 +179,18 @@ class FiberSpectrographTranslator(LsstBaseTranslator):
             if len(dayobs) != 8:
                 raise ValueError(f"Malformed dayobs: {dayobs}")
 
+        block = 0
+        if controller is not None:
+            block = cls._CONTROLLERS.find(controller)
+            if block == -1:
+                raise ValueError(f"Supplied controller, '{controller}' is not in supported list: "
+                                 f"{cls._CONTROLLERS}")
+        if not 0 <= spectrograph < cls.DETECTOR_MAX:
+            raise ValueError(f"Spectrograph ({spectrograph}) is not in the range [0, {cls.DETECTOR_MAX})")
+        block += len(cls._CONTROLLERS)*spectrograph
+
+        dayobs = int(dayobs) + block*1000_00_00
+
         # Expect no more than 99,999 exposures in a day
         maxdigits = 5
         if seqnum >= 10**maxdigits:
@@ -158,6 +202,25 @@ class FiberSpectrographTranslator(LsstBaseTranslator):
         # Exposure ID has to be an integer
         return int(idstr)
 
+    @classmethod
+    def max_exposure_id(cls):
+        """The maximum exposure ID expected from this instrument.
+
+        Returns
+        -------
+        max_id : `int`
+            The ID of the last exposure possible with the last controller
+            and spectrograph.
+        """
+        return cls.compute_exposure_id(2999_12_31, 10**5 - 1, controller=cls._CONTROLLERS[-1],
+                                       spectrograph=cls.DETECTOR_MAX - 1)
+
+    @cache_translation
+    def to_exposure_id(self):
+        self._used_these_cards("DAYOBS", "SEQNUM")
+        return self.compute_exposure_id(self._header["DAYOBS"], self._header["SEQNUM"],
+                                        spectrograph=self.to_detector_num())
+
     @cache_translation
     def to_visit_id(self):
         """Calculate the visit associated with this exposure.
@@ -0,0 +1,70 @@
+"""Tests of the in-process calibration cache.
+"""
+
+import unittest
+
+import lsst.utils.tests
+from lsst.obs.fiberspectrograph.calibCache import CalibrationCache
+
+
+class CalibrationCacheTestCase(lsst.utils.tests.TestCase):
+    def testHitsAndMisses(self):
+        cache = CalibrationCache(maxSize=2)
+        calls = []
+
+        def factory(value):
+            def make():
+                calls.append(value)
+                return value
+            return make
+
+        self.assertEqual(cache.get("a", factory(1)), (1, False))
+        self.assertEqual(cache.get("a", factory(2)), (1, True))
+        self.assertEqual(calls, [1])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def testEviction(self):
+        cache = CalibrationCache(maxSize=2)
+        cache.get("a", lambda: 1)
+        cache.get("b", lambda: 2)
+        cache.get("a", lambda: 1)       # "b" is now the least recently used
+        cache.get("c", lambda: 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertIn("c", cache)
+
+        with self.assertRaises(ValueError):
+            cache.resize(0)
+
+    def testReserve(self):
+        cache = CalibrationCache(maxSize=2)
+        cache.get("a", lambda: 1)
+        cache.get("b", lambda: 2)
+
+        # Asking for less room must not evict anything
+        cache.reserve(1)
+        self.assertEqual(cache.maxSize, 2)
+        self.assertEqual(len(cache), 2)
+
+        cache.reserve(3)
+        self.assertEqual(cache.maxSize, 3)
+
+    def testClear(self):
+        cache = CalibrationCache(maxSize=2)
+        cache.get("a", lambda: 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -23,20 +23,33 @@ class FiberSpectrographIngestTestCase(IngestTestBase, lsst.utils.tests.TestCase)
     visits = None                       # we don't have a definition of visits
     ingestDatasetTypeName = "rawSpectrum"
 
+    fileName = "Broad_fiberSpecBroad_2024-01-09T17:41:34.996.fits"
+    exposure = 2024010900004
+    detector = 0
+
     def setUp(self):
         self.ingestdir = os.path.dirname(__file__)
         self.instrument = FiberSpectrograph()
-        self.file = os.path.join(testDataDirectory,
-                                 "Broad_fiberSpecBroad_2024-01-09T17:41:34.996.fits")
+        self.file = os.path.join(testDataDirectory, self.fileName)
 
-        day_obs = 20240109
-        seq_num = 4
-        self.dataIds = [dict(instrument="FiberSpec", exposure=100000 * day_obs + seq_num, detector=0)]
+        self.dataIds = [dict(instrument="FiberSpec", exposure=self.exposure,
+                             detector=self.detector)]
         self.filterLabel = FIBER_SPECTROGRAPH_FILTER_DEFINITIONS[0].makeFilterLabel()
 
         super().setUp()
 
 
+class FiberSpectrographRedIngestTestCase(FiberSpectrographIngestTestCase):
+    """Ingest from a second spectrograph, which has its own detector and,
+    for the same DAYOBS and SEQNUM, its own exposure ID.
+    """
+
+    # The Broad file with INSTRUME, OBSID and CONTRLLR edited.
+    fileName = "Red_fiberSpecRed_2024-01-09T17:41:34.996.fits"
+    exposure = 7024010900004            # the year is offset by 5000 per spectrograph
+    detector = 1
+
+
 def setup_module(module):
     lsst.utils.tests.init()
 
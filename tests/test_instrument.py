@@ -13,7 +13,7 @@ class TestStarTracker(InstrumentTests, lsst.utils.tests.TestCase):
         physical_filters = set(["empty"])
 
         self.data = InstrumentTestData(name="FiberSpec",
-                                       nDetectors=1,
+                                       nDetectors=3,
                                        firstDetectorName="ccd0",
                                        physical_filters=physical_filters)
         self.instrument = lsst.obs.fiberspectrograph.FiberSpectrograph()
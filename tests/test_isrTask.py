@@ -0,0 +1,186 @@
+"""Tests of the fiber spectrograph IsrTask.
+"""
+
+import os
+import pickle
+import types
+import unittest
+import unittest.mock
+import uuid
+
+import numpy as np
+import yaml
+
+import lsst.ip.isr
+import lsst.pipe.base as pipeBase
+import lsst.utils.tests
+from lsst.obs.fiberspectrograph import FiberSpectrum
+from lsst.obs.fiberspectrograph import isrTask
+from lsst.obs.fiberspectrograph.isrTask import IsrTask, IsrTaskConfig
+
+testDataDirectory = os.path.join(os.path.dirname(__file__), "data")
+pipelineDirectory = os.path.join(os.path.dirname(__file__), os.pardir, "pipelines", "fiberspectrograph")
+
+
+class MockButlerQC:
+    """Minimal stand-in for a `~lsst.pipe.base.QuantumContext`."""
+
+    def __init__(self, datasets):
+        self.datasets = datasets
+        self.nGets = {}
+        self.outputs = []
+
+    def get(self, ref):
+        self.nGets[ref.id] = self.nGets.get(ref.id, 0) + 1
+        return pickle.loads(pickle.dumps(self.datasets[ref.id]))
+
+    def put(self, values, refs):
+        self.outputs.append(values)
+
+
+def _runQuantum(task, butlerQC, inputRefs, outputRefs):
+    """Stand-in for lsst.ip.isr.IsrTask.runQuantum."""
+    inputs = {name: butlerQC.get(ref) for name, ref in vars(inputRefs).items()}
+    butlerQC.put(task.run(**inputs), outputRefs)
+
+
+def _run(task, ccdExposure, **kwargs):
+    """Stand-in for lsst.ip.isr.IsrTask.run."""
+    return pipeBase.Struct(outputExposure=ccdExposure)
+
+
+class IsrTaskTestBase:
+    def setUp(self):
+        self.raw = FiberSpectrum.readFits(
+            os.path.join(testDataDirectory, "Broad_fiberSpecBroad_2024-01-09T17:41:34.996.fits"))
+        self.bias = pickle.loads(pickle.dumps(self.raw))
+        self.bias.flux = np.full_like(self.raw.flux, 100.0)
+
+        self.biasRef = types.SimpleNamespace(id=uuid.uuid4())
+        self.rawRefs = [types.SimpleNamespace(id=uuid.uuid4()) for _ in range(3)]
+        datasets = {ref.id: self.raw for ref in self.rawRefs}
+        datasets[self.biasRef.id] = self.bias
+        self.butlerQC = MockButlerQC(datasets)
+
+        self.config = IsrTaskConfig()
+        self.config.doBias = False
+        self.config.doSpectrumBias = True
+        self.config.doCalibCache = True
+
+        isrTask._calibCache.clear()
+        isrTask._calibCache.resize(1)
+
+    def runQuanta(self):
+        """Run each raw as a quantum with a new task, as executors do."""
+        tasks = []
+        for rawRef in self.rawRefs:
+            task = IsrTask(config=self.config)
+            inputRefs = types.SimpleNamespace(ccdExposure=rawRef, spectrumBias=self.biasRef)
+            task.runQuantum(self.butlerQC, inputRefs, None)
+            self.assertIs(inputRefs.spectrumBias, self.biasRef)
+            tasks.append(task)
+        return tasks
+
+
+@unittest.mock.patch.object(lsst.ip.isr.IsrTask, "run", _run)
+@unittest.mock.patch.object(lsst.ip.isr.IsrTask, "runQuantum", _runQuantum)
+class IsrTaskTestCase(IsrTaskTestBase, lsst.utils.tests.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.expectedFlux = np.subtract(self.raw.flux, self.bias.flux,
+                                        dtype=np.float64).astype(self.raw.flux.dtype)
+
+    def testCalibCache(self):
+        tasks = self.runQuanta()
+
+        self.assertEqual(self.butlerQC.nGets[self.biasRef.id], 1)
+        self.assertEqual([task.metadata["calibCacheMisses"] for task in tasks], [1, 0, 0])
+        self.assertEqual([task.metadata["calibCacheHits"] for task in tasks], [0, 1, 1])
+        for outputs in self.butlerQC.outputs:
+            np.testing.assert_array_equal(outputs.outputExposure.flux, self.expectedFlux)
+
+    def testNoCalibCache(self):
+        self.config.doCalibCache = False
+        tasks = self.runQuanta()
+
+        self.assertEqual(self.butlerQC.nGets[self.biasRef.id], len(self.rawRefs))
+        self.assertNotIn("calibCacheHits", tasks[0].metadata)
+        for outputs in self.butlerQC.outputs:
+            np.testing.assert_array_equal(outputs.outputExposure.flux, self.expectedFlux)
+
+    def testValidate(self):
+        self.config.doBias = True
+        with self.assertRaises(ValueError):
+            self.config.validate()
+
+        self.config.doBias = False
+        self.config.doSpectrumBias = False
+        with self.assertRaises(ValueError):
+            self.config.validate()
+
+    def testCacheSize(self):
+        self.config.calibCacheSize = 20
+        self.runQuanta()
+        self.assertEqual(isrTask._calibCache.maxSize, 20)
+
+        # A task asking for a smaller cache must not shrink it
+        self.config.calibCacheSize = 1
+        self.runQuanta()
+        self.assertEqual(isrTask._calibCache.maxSize, 20)
+
+
+@unittest.mock.patch.object(lsst.ip.isr.IsrTask, "runQuantum", _runQuantum)
+class IsrTaskRunTestCase(IsrTaskTestBase, lsst.utils.tests.TestCase):
+    """Tests that go through lsst.ip.isr.IsrTask.run, configured as in the
+    ISR pipeline.
+    """
+
+    def setUp(self):
+        super().setUp()
+        with open(os.path.join(pipelineDirectory, "ISR.yaml")) as fd:
+            overrides = yaml.safe_load(fd)["tasks"]["isr"]["config"]
+        for name, value in overrides.items():
+            setattr(self.config, name, value)
+        self.config.doSpectrumBias = True
+        self.config.doCalibCache = True
+        self.config.validate()
+
+    def checkOutput(self, spectrum):
+        flux = self.raw.flux.astype(np.float64)
+        saturated = flux > self.raw.getDetector()[0].getSaturation()
+        self.assertEqual(spectrum.flux.dtype, np.dtype(self.config.fluxDtype))
+        self.assertEqual(spectrum.mask.dtype, np.dtype(self.config.maskDtype))
+        self.assertTrue(np.all(np.isnan(spectrum.flux[saturated])))
+        np.testing.assert_allclose(spectrum.flux[~saturated], flux[~saturated] - 100.0, rtol=1e-6)
+
+    def testRun(self):
+        raw = pickle.loads(pickle.dumps(self.raw))
+        result = IsrTask(config=self.config).run(raw, spectrumBias=self.bias)
+        self.checkOutput(result.outputExposure)
+
+        with self.assertRaises(RuntimeError):
+            IsrTask(config=self.config).run(pickle.loads(pickle.dumps(self.raw)))
+
+    def testDtypes(self):
+        self.config.fluxDtype = "float64"
+        self.config.maskDtype = "int32"
+        result = IsrTask(config=self.config).run(pickle.loads(pickle.dumps(self.raw)),
+                                                 spectrumBias=self.bias)
+        self.checkOutput(result.outputExposure)
+
+    def testCalibCache(self):
+        tasks = self.runQuanta()
+
+        self.assertEqual(self.butlerQC.nGets[self.biasRef.id], 1)
+        self.assertEqual([task.metadata["calibCacheHits"] for task in tasks], [0, 1, 1])
+        for outputs in self.butlerQC.outputs:
+            self.checkOutput(outputs.outputExposure)
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
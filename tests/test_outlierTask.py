@@ -0,0 +1,135 @@
+"""Tests of outlier rejection in time series of spectra.
+"""
+
+import math
+import os
+import pickle
+import types
+import unittest
+import uuid
+
+import numpy as np
+
+import lsst.utils.tests
+from lsst.obs.fiberspectrograph import FiberSpectrum
+from lsst.obs.fiberspectrograph.outlierTask import OutlierRejectionTask
+
+testDataDirectory = os.path.join(os.path.dirname(__file__), "data")
+
+
+class MockButlerQC:
+    """Minimal stand-in for a `~lsst.pipe.base.QuantumContext`."""
+
+    def __init__(self, datasets):
+        self.datasets = datasets
+        self.nGets = {}
+        self.outputs = {}
+
+    def get(self, ref):
+        self.nGets[ref.id] = self.nGets.get(ref.id, 0) + 1
+        return pickle.loads(pickle.dumps(self.datasets[ref.id]))
+
+    def put(self, value, ref):
+        self.outputs[ref.id] = value
+
+
+def makeRef(exposure):
+    return types.SimpleNamespace(id=uuid.uuid4(), dataId={"exposure": exposure})
+
+
+class OutlierRejectionTaskTestCase(lsst.utils.tests.TestCase):
+    def setUp(self):
+        spectrum = FiberSpectrum.readFits(
+            os.path.join(testDataDirectory, "Broad_fiberSpecBroad_2024-01-09T17:41:34.996.fits"))
+
+        rng = np.random.default_rng(12345)
+        self.spectra = []
+        for i in range(30):
+            copy = pickle.loads(pickle.dumps(spectrum))
+            copy.flux = (1000 + 10*rng.standard_normal(copy.flux.shape)).astype(copy.flux.dtype)
+            copy.mask = np.zeros(copy.flux.shape, dtype=FiberSpectrum.maskDtype)
+            self.spectra.append(copy)
+
+        self.hits = [(0, 5), (12, 100), (29, 2000)]
+        for i, j in self.hits:
+            self.spectra[i].flux[j] += 1000
+
+        self.task = OutlierRejectionTask()
+
+    def testRun(self):
+        result = self.task.run(self.spectra)
+        bitMask = self.spectra[0].getPlaneBitMask(self.task.config.maskPlaneName)
+
+        for i, j in self.hits:
+            self.assertTrue(result.outputSpectra[i].mask[j] & bitMask)
+        self.assertGreaterEqual(result.nOutliers.sum(), len(self.hits))
+        # Allow for a few tail events in the Gaussian noise
+        self.assertLess(result.nOutliers.sum(), len(self.hits) + 5)
+
+    def testFalsePositiveRate(self):
+        # Use a low threshold, so the expected number of Gaussian tail
+        # events is large enough to test.
+        self.task.config.nSigma = 4.0
+        expectedRate = math.erfc(4.0/math.sqrt(2))
+
+        rng = np.random.default_rng(54321)
+        stack = (1000 + 10*rng.standard_normal((200, 2048))).astype(np.float32)
+        nOutliers = self.task.findOutliers(stack).sum()
+        expected = expectedRate*stack.size
+        self.assertLess(abs(nOutliers - expected), 4*math.sqrt(expected))
+
+        # Noise that increases with the flux along the series
+        flux = np.linspace(1000, 4000, 1000)[:, np.newaxis]*np.ones(2048)
+        stack = (flux + np.sqrt(flux)*rng.standard_normal(flux.shape)).astype(np.float32)
+        outliers = self.task.findOutliers(stack)
+        for half in (outliers[:500], outliers[500:]):
+            expected = expectedRate*half.size
+            self.assertLess(abs(half.sum() - expected), 4*math.sqrt(expected))
+
+    def testChunking(self):
+        stack = np.array([spectrum.flux for spectrum in self.spectra], dtype=np.float32)
+        expected = self.task.findOutliers(stack)
+
+        self.task.config.maxChunkBytes = 1
+        np.testing.assert_array_equal(self.task.findOutliers(stack), expected)
+
+    def testRunQuantum(self):
+        # Give the refs out of time order
+        exposures = np.random.default_rng(1).permutation(len(self.spectra))
+        inputRefs = [makeRef(exposure) for exposure in exposures]
+        outputRefs = [makeRef(exposure) for exposure in exposures]
+        butlerQC = MockButlerQC({ref.id: self.spectra[ref.dataId["exposure"]] for ref in inputRefs})
+
+        self.task.runQuantum(butlerQC, types.SimpleNamespace(inputSpectra=inputRefs),
+                             types.SimpleNamespace(outputSpectra=outputRefs))
+        self.assertEqual(set(butlerQC.nGets.values()), {1})
+
+        expected = self.task.run(self.spectra).outputSpectra
+        for ref in outputRefs:
+            output = butlerQC.outputs[ref.id]
+            spectrum = expected[ref.dataId["exposure"]]
+            np.testing.assert_array_equal(output.flux, spectrum.flux)
+            self.assertEqual(output.flux.dtype, spectrum.flux.dtype)
+            np.testing.assert_array_equal(output.mask, spectrum.mask)
+            self.assertEqual(output.getMetadata(), spectrum.getMetadata())
+
+    def testNearlyConstant(self):
+        # A quantisation step in an otherwise constant pixel is not an outlier
+        stack = np.full((30, 100), 1000, dtype=np.float32)
+        stack[10, 50] += 1
+        self.assertFalse(self.task.findOutliers(stack).any())
+
+    def testTooFewSpectra(self):
+        result = self.task.run(self.spectra[:2])
+        self.assertEqual(result.nOutliers.sum(), 0)
+        for spectrum in result.outputSpectra:
+            self.assertFalse(spectrum.mask.any())
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
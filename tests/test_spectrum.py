@@ -0,0 +1,133 @@
+"""Tests of the FiberSpectrum class.
+"""
+
+import multiprocessing
+import os
+import pickle
+import unittest
+
+import astropy.io.fits
+import numpy as np
+
+import lsst.utils.tests
+from lsst.obs.fiberspectrograph import FiberSpectrum, SharedFiberSpectrum
+
+testDataDirectory = os.path.join(os.path.dirname(__file__), "data")
+
+
+def _summarizeInWorker(handle):
+    """Summarize a shared spectrum in a worker process, then modify it."""
+    spectrum = handle.get()
+    summary = (float(spectrum.flux.sum()), spectrum.getDetector().getId(),
+               spectrum.getMetadata()["OBSID"])
+    spectrum.flux[0] = -1
+    return summary
+
+
+class FiberSpectrumTestCase(lsst.utils.tests.TestCase):
+    def setUp(self):
+        self.path = os.path.join(testDataDirectory, "Broad_fiberSpecBroad_2024-01-09T17:41:34.996.fits")
+        self.spectrum = FiberSpectrum.readFits(self.path)
+
+    def assertSpectraEqual(self, spectrum1, spectrum2):
+        np.testing.assert_array_equal(spectrum1.wavelength, spectrum2.wavelength)
+        self.assertEqual(spectrum1.wavelength.unit, spectrum2.wavelength.unit)
+        np.testing.assert_array_equal(spectrum1.flux, spectrum2.flux)
+        np.testing.assert_array_equal(spectrum1.mask, spectrum2.mask)
+        np.testing.assert_array_equal(spectrum1.variance, spectrum2.variance)
+        self.assertEqual(spectrum1.getMetadata(), spectrum2.getMetadata())
+        self.assertEqual(spectrum1.getDetector().getId(), spectrum2.getDetector().getId())
+        self.assertEqual(spectrum1.getInfo(), spectrum2.getInfo())
+
+    def testPickle(self):
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            with self.subTest(protocol=protocol):
+                copy = pickle.loads(pickle.dumps(self.spectrum, protocol=protocol))
+                self.assertSpectraEqual(self.spectrum, copy)
+
+    def testPickleOutOfBand(self):
+        buffers = []
+        data = pickle.dumps(self.spectrum, protocol=5, buffer_callback=buffers.append)
+        # Every array should travel out-of-band, leaving only the header
+        # and reconstruction information in the pickle stream.
+        self.assertEqual(len(buffers), 4)
+        self.assertLess(len(data), sum(buffer.raw().nbytes for buffer in buffers))
+
+        copy = pickle.loads(data, buffers=buffers)
+        self.assertSpectraEqual(self.spectrum, copy)
+
+    def testSharedMemory(self):
+        with SharedFiberSpectrum(self.spectrum) as handle:
+            # Only the header and layout go through the pipe
+            self.assertLess(len(pickle.dumps(handle)), self.spectrum.flux.nbytes)
+
+            with multiprocessing.Pool(1) as pool:
+                summary = pool.apply(_summarizeInWorker, (handle,))
+            self.assertEqual(summary, (float(self.spectrum.flux.sum()),
+                                       self.spectrum.getDetector().getId(),
+                                       self.spectrum.getMetadata()["OBSID"]))
+
+            # The worker's change is seen here, as the memory is shared
+            shared = handle.get()
+            self.assertEqual(shared.flux[0], -1)
+            np.testing.assert_array_equal(shared.flux[1:], self.spectrum.flux[1:])
+            np.testing.assert_array_equal(shared.mask, self.spectrum.mask)
+            np.testing.assert_array_equal(shared.variance, self.spectrum.variance)
+
+    def testReadDtypes(self):
+        self.assertEqual(self.spectrum.flux.dtype, FiberSpectrum.fluxDtype)
+        self.assertEqual(self.spectrum.variance.dtype, FiberSpectrum.fluxDtype)
+        self.assertEqual(self.spectrum.mask.dtype, FiberSpectrum.maskDtype)
+
+        class DoubleFiberSpectrum(FiberSpectrum):
+            fluxDtype = np.float64
+            maskDtype = np.int32
+
+        spectrum = DoubleFiberSpectrum.readFits(self.path)
+        self.assertEqual(spectrum.flux.dtype, np.float64)
+        self.assertEqual(spectrum.variance.dtype, np.float64)
+        self.assertEqual(spectrum.mask.dtype, np.int32)
+        np.testing.assert_allclose(spectrum.flux, self.spectrum.flux, rtol=1e-6)
+
+    def testWriteDtypes(self):
+        self.spectrum.applyDtypes(np.float64, np.int32)
+
+        with lsst.utils.tests.getTempFilePath(".fits") as path:
+            self.spectrum.writeFits(path)
+            with astropy.io.fits.open(path) as fitsfile:
+                self.assertEqual(fitsfile[0].data.dtype.type, np.float32)
+                self.assertEqual(fitsfile[2].data.dtype.type, np.uint16)
+                self.assertEqual(fitsfile[3].data.dtype.type, np.float32)
+
+        # Writing converts copies, leaving the in-memory spectrum alone
+        self.assertEqual(self.spectrum.flux.dtype, np.float64)
+        self.assertEqual(self.spectrum.variance.dtype, np.float64)
+        self.assertEqual(self.spectrum.mask.dtype, np.int32)
+
+    def testMaskNarrowing(self):
+        self.spectrum.mask = np.array([1 << 17 | 8, 0], dtype=np.int32)
+        with self.assertRaises(ValueError):
+            self.spectrum.applyDtypes()
+
+        self.spectrum.mask = np.array([-1, 0], dtype=np.int32)
+        with self.assertRaises(ValueError):
+            self.spectrum.applyDtypes()
+
+        # Only the bits that are set matter
+        self.spectrum.mask = np.array([1 << 7 | 8, 0], dtype=np.int32)
+        self.spectrum.applyDtypes(maskDtype=np.uint8)
+        np.testing.assert_array_equal(self.spectrum.mask, [1 << 7 | 8, 0])
+        self.assertEqual(self.spectrum.mask.dtype, np.uint8)
+
+        with self.assertRaises(ValueError):
+            self.spectrum.getPlaneBitMask("NO_DATA")
+        self.assertEqual(self.spectrum.getPlaneBitMask("BAD"), 1)
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
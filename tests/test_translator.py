@@ -0,0 +1,78 @@
+"""Tests of the FiberSpectrograph metadata translator.
+"""
+
+import os
+import unittest
+
+import astropy.io.fits
+
+import lsst.utils.tests
+from astro_metadata_translator import ObservationInfo
+from lsst.obs.fiberspectrograph.translator import FiberSpectrographTranslator
+
+testDataDirectory = os.path.join(os.path.dirname(__file__), "data")
+
+
+class FiberSpectrographTranslatorTestCase(lsst.utils.tests.TestCase):
+    def setUp(self):
+        with astropy.io.fits.open(os.path.join(testDataDirectory,
+                                               "Broad_fiberSpecBroad_2024-01-09T17:41:34.996.fits")) as f:
+            self.header = dict(f[0].header)
+
+    def testDetectors(self):
+        for instrume, detectorNum, detectorName in [("FiberSpectrograph.Broad", 0, "ccd0"),
+                                                    ("FiberSpectrograph.Red", 1, "ccd1"),
+                                                    ("FiberSpectrograph.Blue", 2, "ccd2")]:
+            with self.subTest(instrume=instrume):
+                header = dict(self.header, INSTRUME=instrume)
+                self.assertTrue(FiberSpectrographTranslator.can_translate(header))
+
+                info = ObservationInfo(header, translator_class=FiberSpectrographTranslator)
+                self.assertEqual(info.detector_num, detectorNum)
+                self.assertEqual(info.detector_name, detectorName)
+
+    def testExposureIds(self):
+        exposureIds = {}
+        for instrume in FiberSpectrographTranslator._detector_map:
+            header = dict(self.header, INSTRUME=instrume)
+            info = ObservationInfo(header, translator_class=FiberSpectrographTranslator)
+            exposureIds[instrume] = info.exposure_id
+            self.assertEqual(info.detector_exposure_id,
+                             FiberSpectrographTranslator.DETECTOR_MAX*info.exposure_id + info.detector_num)
+
+        # Broad exposure IDs are unchanged, and each spectrograph has its own
+        self.assertEqual(exposureIds["FiberSpectrograph.Broad"], 2024010900004)
+        self.assertEqual(exposureIds["FiberSpectrograph.Red"], 7024010900004)
+        self.assertEqual(exposureIds["FiberSpectrograph.Blue"], 12024010900004)
+
+        self.assertGreaterEqual(FiberSpectrographTranslator.max_exposure_id(), max(exposureIds.values()))
+
+    def testExposureIdBlocks(self):
+        """Check that no controller and spectrograph share exposure IDs."""
+        translator = FiberSpectrographTranslator
+        ranges = []
+        for spectrograph in range(translator.DETECTOR_MAX):
+            for controller in translator._CONTROLLERS:
+                first = translator.compute_exposure_id("2000-01-01", 0, controller, spectrograph)
+                last = translator.compute_exposure_id("2999-12-31", 99_999, controller, spectrograph)
+                ranges.append((first, last))
+        ranges.sort()
+        for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]):
+            self.assertLess(end, start)
+        self.assertEqual(ranges[-1][1], translator.max_exposure_id())
+
+        with self.assertRaises(ValueError):
+            translator.compute_exposure_id("2024-01-09", 4, spectrograph=translator.DETECTOR_MAX)
+
+    def testUnknownInstrument(self):
+        header = dict(self.header, INSTRUME="FiberSpectrograph.Unknown")
+        self.assertFalse(FiberSpectrographTranslator.can_translate(header))
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()